@@ -1,3 +1,4 @@
+import os
 from flask import Flask, render_template, request
 from seo3 import HybridSEOSystem  # Ensure this import is correct
 
@@ -21,5 +22,8 @@ def home():
 def page_not_found(e):
     return render_template('404.html'), 404  # Custom 404 page
 
+# Development server only. In production run it under hypercorn, which serves this
+# WSGI app through its WSGI adapter on worker threads, e.g.
+#   hypercorn app:app --workers 4
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1')
@@ -1,13 +1,88 @@
-from flask import Flask, render_template, request, jsonify
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html import unescape as html_unescape
+from operator import itemgetter
+from urllib.parse import unquote
+from flask import Flask, Response, render_template, request, stream_with_context
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree, html
+from sortedcontainers import SortedKeyList
+
+FETCH_WORKERS = 8  # Threads fetching result pages
+POOL_SIZE = 20  # Keep-alive connections
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.3  # Seconds, doubled after each failed attempt
+REQUEST_TIMEOUT = (3, 10)  # Connect and read timeouts in seconds
+# Non-browser agent on purpose: Google then serves the plain results page with
+# /url?q= links that search_webpages parses
+HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible; SEOKeywordSearch/1.0)'}
+
+# Google wraps each result as /url?q=<target>&...
+SEARCH_LINK_RE = re.compile(r'/url\?q=([^&]+)')
+
+# Fast path for analyze(): the three head fields straight from the raw bytes
+TITLE_RE = re.compile(rb'<title[^>]*>(?P<value>[^<]*)</title>', re.I)
+# Attribute names must follow whitespace so data-name=/data-content= don't match;
+# the values themselves compare case-sensitively, as BeautifulSoup does
+META_DESCRIPTION_RE = re.compile(
+    rb'<meta[^>]*?\sname\s*=\s*["\'](?-i:description)["\'][^>]*?\scontent\s*=\s*(["\'])(?P<value>.*?)\1',
+    re.I | re.S)
+OG_TITLE_RE = re.compile(
+    rb'<meta[^>]*?\sproperty\s*=\s*["\'](?-i:og:title)["\'][^>]*?\scontent\s*=\s*(["\'])(?P<value>.*?)\1',
+    re.I | re.S)
+
+# Only build the tags we read instead of the full DOM
+SEO_STRAINER = SoupStrainer(['title', 'meta'])
+
+CACHE_TTL = 3600  # Seconds before a result page's analysis is refetched
+ANALYSIS_CACHE_SIZE = 1024
+RESULTS_CACHE_TTL = 300  # Seconds a finished /search response is replayed
+RESULTS_CACHE_SIZE = 256
+
+MAX_HEAD_BYTES = 65536  # Stop downloading a result page after this much
+CHUNK_SIZE = 4096
+
+# Shown in place of a description when a result page could not be fetched or parsed
+FETCH_ERROR_DESCRIPTION = "Error fetching meta description."
+
+# (ranking tag, trie keyword, relevance) for each element analyze() extracts
+SEO_TAGS = (
+    ("Title", "title", 10),
+    ("Meta Description", "meta description", 8),
+    ("OG Title", "og title", 6),
+)
 
 # Trie for Keyword Matching
 class TrieNode:
+    __slots__ = ('children', 'is_end_of_word')
+
     def __init__(self):
-        self.children = {}
+        self.children = []  # (char, TrieNode) pairs kept sorted for bisect lookups
         self.is_end_of_word = False
 
+    def find_child(self, char):
+        i = bisect_left(self.children, (char,))
+        if i < len(self.children) and self.children[i][0] == char:
+            return self.children[i][1]
+        return None
+
+    def insert_child(self, char):
+        i = bisect_left(self.children, (char,))
+        if i < len(self.children) and self.children[i][0] == char:
+            return self.children[i][1]
+        child = TrieNode()
+        self.children.insert(i, (char, child))
+        return child
+
 class Trie:
     def __init__(self):
         self.root = TrieNode()
@@ -15,29 +90,36 @@ class Trie:
     def insert(self, word):
         node = self.root
         for char in word:
-            if char not in node.children:
-                node.children[char] = TrieNode()
-            node = node.children[char]
+            node = node.insert_child(char)
         node.is_end_of_word = True
 
     def search(self, prefix):
         node = self.root
         for char in prefix:
-            if char not in node.children:
+            node = node.find_child(char)
+            if node is None:
                 return []
-            node = node.children[char]
         return self._collect_words(node, prefix)
 
     def _collect_words(self, node, prefix):
         words = []
-        if node.is_end_of_word:
-            words.append(prefix)
-        for char, child in node.children.items():
-            words.extend(self._collect_words(child, prefix + char))
+        chars = list(prefix)  # Shared path buffer, joined only where a word ends
+        stack = [(node, '', len(chars))]  # (node, edge char, path length above it)
+        while stack:
+            node, char, depth = stack.pop()
+            del chars[depth:]  # Drop the sibling branch walked before this one
+            if char:
+                chars.append(char)
+            if node.is_end_of_word:
+                words.append(''.join(chars))
+            for child_char, child in reversed(node.children):  # Pop in sorted order
+                stack.append((child, child_char, len(chars)))
         return words
 
 # N-ary Tree for Content Hierarchy
 class Node:
+    __slots__ = ('tag', 'content', 'children')
+
     def __init__(self, tag, content=None):
         self.tag = tag
         self.content = content
@@ -46,151 +128,237 @@ class Node:
     def add_child(self, child_node):
         self.children.append(child_node)
 
-# Red-Black Tree for Efficient Search & Ranking
-class RBTreeNode:
-    def __init__(self, tag, relevance, color="red"):
-        self.tag = tag
-        self.relevance = relevance
-        self.color = color
-        self.left = None
-        self.right = None
-
-class RBTree:
-    def __init__(self):
-        self.root = None
-
-    def insert(self, tag, relevance):
-        new_node = RBTreeNode(tag, relevance)
-        if not self.root:
-            new_node.color = "black"  # root is always black
-            self.root = new_node
-        else:
-            self.root = self._insert_recursive(self.root, new_node)
-
-    def _insert_recursive(self, current, node):
-        if not current:
-            return node
-
-        if node.relevance < current.relevance:
-            current.left = self._insert_recursive(current.left, node)
-        elif node.relevance > current.relevance:
-            current.right = self._insert_recursive(current.right, node)
-
-        # Red-black balancing would go here (simplified for demonstration)
-        return current
-
-    def in_order_traversal(self, node):
-        if node:
-            yield from self.in_order_traversal(node.left)
-            yield node.tag, node.relevance
-            yield from self.in_order_traversal(node.right)
-
-# Hybrid System: Combines Trie, N-ary Tree, and Red-Black Tree
-class HybridSEOSystem:
+# LRU Cache with Expiry for Fetched Pages and Analyses
+class LRUCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, value), oldest first
+        self.lock = threading.Lock()  # Flask serves requests from several threads
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)  # Evict least recently used
+
+# Results of One Search: the listing plus its content hierarchy and analyses
+class AuditResult:
     def __init__(self):
-        self.trie = Trie()
+        self.results = []  # (title, link, meta description) for each search hit
         self.hierarchy = Node("SEO Elements")
-        self.rank_tree = RBTree()
         self.analysis_results = []
 
-    def reset(self):
-        self.hierarchy = Node("SEO Elements")  # Reset the hierarchy
-        self.rank_tree = RBTree()  # Reset the ranking tree
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def record_analysis(self, url, title_content, desc_content, og_title_content):
+        # Title Tag
+        title_node = Node("Title", title_content)
+        self.hierarchy.add_child(title_node)
+
+        # Meta Description
+        desc_node = Node("Meta Description", desc_content)
+        self.hierarchy.add_child(desc_node)
+
+        # Open Graph Tags
+        og_node = Node("Open Graph Title", og_title_content)
+        self.hierarchy.add_child(og_node)
+
+        # Store results
+        self.analysis_results.append({
+            "url": url,
+            "title": title_content,
+            "meta_description": desc_content,
+            "og_title": og_title_content
+        })
+
+    def print_analysis_results(self):
+        for result in self.analysis_results:
+            print(f"\nURL: {result['url']}")
+            print(f"Title: {result['title']}")
+            print(f"Meta Description: {result['meta_description']}")
+            print(f"Open Graph Title: {result['og_title']}")
 
+# Hybrid System: Combines Trie, N-ary Tree, and a Sorted List for ranking
+class HybridSEOSystem:
+    def __init__(self):
+        self.trie = Trie()
+        # The analyzed elements never change, so keyword index and ranking are built once
+        self.rank_tree = SortedKeyList(key=itemgetter(1))  # (tag, relevance) by relevance
+        for tag, keyword, relevance in SEO_TAGS:
+            self.trie.insert(keyword)
+            self.rank_tree.add((tag, relevance))
+        self.analysis_cache = LRUCache(ANALYSIS_CACHE_SIZE, CACHE_TTL)  # url -> analyze() output
+
+        # Shared by the fetch threads so connections are reused across searches
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE,
+                              max_retries=Retry(total=MAX_RETRIES, backoff_factor=RETRY_BACKOFF))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    # Each search builds its own AuditResult, so concurrent requests never share one
     def search_webpages(self, keywords):
-        self.reset()  # Reset previous results
-        search_url = f"https://www.google.com/search?q={'+'.join(keywords.split())}"
+        audit = AuditResult()
+        # Pages are recorded as they finish; the listing is then put back in Google's order
+        audit.results = [result for _, result, _ in sorted(self._iter_results(keywords, audit))]
+        return audit
+
+    def iter_search(self, keywords):
+        # Yield each result as soon as its page is analyzed, in completion order;
+        # rank is the 1-based position on Google's page so clients can re-sort.
+        # Pairs each result with whether its page failed to fetch or parse
+        for i, (title, link, description), failed in self._iter_results(keywords, None):
+            yield {"rank": i + 1, "title": title, "link": link, "description": description}, failed
+
+    def _iter_results(self, keywords, audit):
         try:
-            response = requests.get(search_url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            results = []
-            for item in soup.find_all('h3'):  # Example for Google search results
-                title = item.text
-                link = item.find_parent('a')['href']
-
-                # Ensure link is a valid URL and not a redirect
-                if link.startswith('/url?q='):
-                    link = link.split('/url?q=')[1].split('&')[0]  # Extract the actual URL
-                    meta_description = self.fetch_meta_description(link)
-                    self.fetch_and_analyze(link)  # Analyze the fetched URL
-                    results.append((title, link, meta_description))
-
-            return results
+            _, content = self._get(self._search_url(keywords))
         except requests.exceptions.RequestException as e:
             print(f"Error fetching search results: {e}")
+            return
+        links = self._parse_search_results(content)
+
+        # Fetch and analyze result pages in parallel; each page is recorded on this
+        # thread as soon as it finishes, while the slower ones are still downloading
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            futures = {executor.submit(self._get_analysis, link): i for i, (_, link) in enumerate(links)}
+            for future in as_completed(futures):
+                i = futures[future]
+                title, link = links[i]
+                yield (i, *self._collect_result(audit, title, link, future.result()))
+
+    def _search_url(self, keywords):
+        return f"https://www.google.com/search?q={'+'.join(keywords.split())}"
+
+    def _parse_search_results(self, content):
+        try:
+            tree = html.fromstring(content)
+        except etree.ParserError:  # Empty body, or only comments/whitespace
             return []
 
-    def fetch_meta_description(self, url):
-        try:
-            response = requests.get(url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            meta = soup.find('meta', attrs={'name': 'description'})
-            return meta['content'] if meta else "No meta description found"
-        except:
-            return "Error fetching meta description."
-
-    def fetch_and_analyze(self, url):
-        try:
-            response = requests.get(url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Title Tag
-            title_tag = soup.find('title')
-            title_content = title_tag.text if title_tag else "No title tag found"
-            title_node = Node("Title", title_content)
-            self.hierarchy.add_child(title_node)
-            self.trie.insert("title")
-            self.rank_tree.insert("Title", relevance=10)
-
-            # Meta Description
-            meta_description = soup.find('meta', attrs={'name': 'description'})
-            desc_content = meta_description['content'] if meta_description else "No meta description found"
-            desc_node = Node("Meta Description", desc_content)
-            self.hierarchy.add_child(desc_node)
-            self.trie.insert("meta description")
-            self.rank_tree.insert("Meta Description", relevance=8)
-
-            # Open Graph Tags
-            og_title = soup.find('meta', property='og:title')
-            og_title_content = og_title['content'] if og_title else "No Open Graph title found"
-            og_node = Node("Open Graph Title", og_title_content)
-            self.hierarchy.add_child(og_node)
-            self.trie.insert("og title")
-            self.rank_tree.insert("OG Title", relevance=6)
-
-            # Store results
-            self.analysis_results.append({
-                "url": url,
-                "title": title_content,
-                "meta_description": desc_content,
-                "og_title": og_title_content
-            })
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching {url}: {e}")
+        links = []
+        for anchor in tree.xpath('//a[.//h3]'):  # Example for Google search results
+            title = anchor.xpath('string(.//h3)')
+
+            # Ensure link is a valid URL and not a redirect
+            match = SEARCH_LINK_RE.match(anchor.get('href', ''))
+            if match:
+                links.append((title, unquote(match.group(1))))  # Extract and decode the actual URL
+        return links
+
+    # Returns (result, failed); audit may be None when the caller only needs the listing
+    def _collect_result(self, audit, title, link, analysis):
+        if isinstance(analysis, Exception):
+            print(f"Error fetching {link}: {analysis}")
+            return (title, link, FETCH_ERROR_DESCRIPTION), True
+        page_title, meta_description, og_title = analysis
+        if audit is not None:
+            audit.record_analysis(link, page_title, meta_description, og_title)
+        return (title, link, meta_description), False
+
+    # The Google results page is always fetched fresh; repeat /search queries are
+    # served from results_cache, and result pages from analysis_cache
+    def _get(self, url, head_only=False):
+        with self.session.get(url, timeout=REQUEST_TIMEOUT, stream=True) as response:
+            if head_only:
+                buf = bytearray()
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    buf.extend(chunk)
+                    if self._head_complete(buf, len(chunk)):
+                        break
+                content = bytes(buf)
+            else:
+                content = response.content
+            return response.status_code, content
+
+    def _get_analysis(self, url):
+        analysis = self.analysis_cache.get(url)  # Repeat URLs skip the fetch and parse
+        if analysis is None:
+            try:
+                status, content = self._get(url, head_only=True)
+                analysis = self.analyze(url, content)
+            except Exception as e:
+                return e  # Reported per URL by _collect_result
+            if status == 200:  # Don't pin error pages for CACHE_TTL
+                self.analysis_cache.put(url, analysis)
+        return analysis
+
+    def _head_complete(self, buf, added):
+        # Everything analyze() reads lives in <head>; the closing tag may straddle chunks
+        window = buf[max(0, len(buf) - added - 6):].lower()
+        return b'</head>' in window or len(buf) >= MAX_HEAD_BYTES
+
+    def analyze(self, url, content):
+        title_content, desc_content, og_title_content = self._match_head(content)
+        if None in (title_content, desc_content, og_title_content):
+            # Missing tag, other attribute order or non-UTF-8 text: parse once and
+            # fill in only the fields the regexes missed
+            soup = BeautifulSoup(content, 'lxml', parse_only=SEO_STRAINER)
+
+            if title_content is None:
+                title_tag = soup.find('title')
+                title_content = title_tag.text if title_tag else "No title tag found"
+
+            # Like the regexes, skip tags without a content attribute
+            if desc_content is None:
+                meta_description = soup.find('meta', attrs={'name': 'description', 'content': True})
+                desc_content = meta_description.get('content') if meta_description else "No meta description found"
+
+            if og_title_content is None:
+                og_title = soup.find('meta', attrs={'property': 'og:title', 'content': True})
+                og_title_content = og_title.get('content') if og_title else "No Open Graph title found"
+
+        return title_content, desc_content, og_title_content
+
+    def _match_head(self, content):
+        # None for each field whose regex missed or whose bytes aren't UTF-8
+        values = []
+        for pattern in (TITLE_RE, META_DESCRIPTION_RE, OG_TITLE_RE):
+            match = pattern.search(content)
+            try:
+                values.append(html_unescape(match.group('value').decode('utf-8')) if match else None)
+            except UnicodeDecodeError:
+                values.append(None)
+        return values
 
     def search_keywords(self, prefix):
         return self.trie.search(prefix)
 
     def print_hierarchy(self, node, level=0):
-        print(" " * level * 2 + f"{node.tag}: {node.content if node.content else ''}")
-        for child in node.children:
-            self.print_hierarchy(child, level + 1)
+        stack = [(node, level)]
+        while stack:
+            node, level = stack.pop()
+            print(" " * level * 2 + f"{node.tag}: {node.content if node.content else ''}")
+            for child in reversed(node.children):
+                stack.append((child, level + 1))
 
     def print_ranked_results(self):
         print("Ranked SEO elements:")
-        for tag, relevance in self.rank_tree.in_order_traversal(self.rank_tree.root):
+        for tag, relevance in self.rank_tree:
             print(f"{tag}: relevance {relevance}")
 
-    def print_analysis_results(self):
-        for result in self.analysis_results:
-            print(f"\nURL: {result['url']}")
-            print(f"Title: {result['title']}")
-            print(f"Meta Description: {result['meta_description']}")
-            print(f"Open Graph Title: {result['og_title']}")
-
 app = Flask(__name__)
 hybrid_seo = HybridSEOSystem()
+results_cache = LRUCache(RESULTS_CACHE_SIZE, RESULTS_CACHE_TTL)  # normalized keywords -> NDJSON body
 
 @app.route('/')
 def home():
@@ -199,16 +367,28 @@ def home():
 @app.route('/search', methods=['POST'])
 def search():
     keywords = request.form['keywords']  # Get the keywords from the form
-    results = hybrid_seo.search_webpages(keywords)  # Fetch results based on keywords
-    formatted_results = [
-        {
-            "title": title,
-            "link": link,
-            "description": description
-        }
-        for title, link, description in results
-    ]
-    return jsonify(formatted_results)  # Return results as JSON
-
+    cache_key = ' '.join(keywords.lower().split())
+    body = results_cache.get(cache_key)
+    if body is not None:
+        return Response(body, mimetype='application/x-ndjson')  # Repeat query, no scraping
+
+    def generate():
+        lines = []
+        failed = False
+        for result, result_failed in hybrid_seo.iter_search(keywords):
+            failed = failed or result_failed
+            line = orjson.dumps(result) + b'\n'
+            lines.append(line)
+            yield line
+        # Only cache complete, error-free searches; a transient failure shouldn't be replayed
+        if lines and not failed:
+            results_cache.put(cache_key, b''.join(lines))
+
+    # Stream one JSON object per line as each result page is analyzed
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# Development server only. In production run it under hypercorn, which serves this
+# WSGI app through its WSGI adapter on worker threads, e.g.
+#   hypercorn seo3:app --workers 4
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1')